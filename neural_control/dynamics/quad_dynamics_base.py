@@ -65,17 +65,11 @@ class Dynamics:
         :return: The transformation matrix.
         """
 
-        # check if we have a cached result already available
-        roll = attitude[:, 0]
-        pitch = attitude[:, 1]
-        yaw = attitude[:, 2]
-
-        Cy = torch.cos(yaw)
-        Sy = torch.sin(yaw)
-        Cp = torch.cos(pitch)
-        Sp = torch.sin(pitch)
-        Cr = torch.cos(roll)
-        Sr = torch.sin(roll)
+        # one sin and one cos call for all three angles
+        sin_att = torch.sin(attitude)
+        cos_att = torch.cos(attitude)
+        Sr, Sp, Sy = sin_att[:, 0], sin_att[:, 1], sin_att[:, 2]
+        Cr, Cp, Cy = cos_att[:, 0], cos_att[:, 1], cos_att[:, 2]
 
         # create matrix
         m1 = torch.transpose(torch.vstack([Cy * Cp, Sy * Cp, -Sp]), 0, 1)
@@ -243,26 +243,24 @@ def full_state_training_data(
     # TODO: might want to sample less frequently
     drone_states = np.zeros((len_data + 200, 12))
     ref_states = np.zeros((len_data + 200, ref_length, ref_size))
+    # offsets of the reference states relative to the drone state index
+    ref_offsets = np.arange(1, ref_length + 1)
 
     counter = 0
     while counter < len_data:
         traj = load_prepare_trajectory(
             "data/traj_data_1", dt, speed_factor, test=0
         )[:, :ref_size]
-        traj_cut = traj[:-(ref_length + 1)]
         # select every xth sample as the current drone state
-        selected_starts = traj_cut[::sample_freq, :]
-        nr_states_added = len(selected_starts)
-
-        full_drone_state = np.hstack(
-            (selected_starts, np.zeros((len(selected_starts), 3)))
-        )
-        # add drone states
-        drone_states[counter:counter + nr_states_added, :] = full_drone_state
-        # add ref states
-        for i in range(1, ref_length + 1):
-            ref_states[counter:counter + nr_states_added,
-                       i - 1] = (traj[i::sample_freq])[:nr_states_added]
+        start_inds = np.arange(0, len(traj) - (ref_length + 1), sample_freq)
+        nr_states_added = len(start_inds)
+
+        # add drone states (angular velocity stays zero)
+        drone_states[counter:counter + nr_states_added, :ref_size] = traj[
+            start_inds]
+        # add ref states: the ref_length states following each start
+        ref_states[counter:counter + nr_states_added] = traj[
+            start_inds[:, np.newaxis] + ref_offsets[np.newaxis, :]]
 
         counter += nr_states_added
 
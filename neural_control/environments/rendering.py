@@ -1,3 +1,5 @@
+import functools
+import math
 import numpy as np
 from neural_control.environments.cartpole_rendering import LineStyle
 from neural_control.environments.helper_simple_env import Euler
@@ -6,15 +8,76 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
 import time
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, without it the kernels run as plain python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def _wtb_kernel(roll, pitch, yaw, out):
+    """
+    Writes the world to body matrix for the given Euler angles into `out`.
+    """
+    Cy = math.cos(yaw)
+    Sy = math.sin(yaw)
+    Cp = math.cos(pitch)
+    Sp = math.sin(pitch)
+    Cr = math.cos(roll)
+    Sr = math.sin(roll)
+
+    # common subexpressions
+    CySp = Cy * Sp
+    SySp = Sy * Sp
+
+    out[0, 0] = Cy * Cp
+    out[0, 1] = Sy * Cp
+    out[0, 2] = -Sp
+    out[1, 0] = CySp * Sr - Cr * Sy
+    out[1, 1] = Cr * Cy + Sr * SySp
+    out[1, 2] = Cp * Sr
+    out[2, 0] = CySp * Cr + Sr * Sy
+    out[2, 1] = Cr * SySp - Cy * Sr
+    out[2, 2] = Cr * Cp
+
+
+# The caches only hold the last few attitudes: they pay off within one frame,
+# where draw_fixed_wing, quad_as_plane etc. rotate many vectors with the
+# same Euler angles.
+@functools.lru_cache(maxsize=16)
+def _wtb_cached(roll, pitch, yaw):
+    """
+    Cached world to body matrix for the given Euler angles. The returned
+    array is shared between calls and therefore read-only.
+    """
+    matrix = np.empty((3, 3), dtype=np.float32)
+    _wtb_kernel(roll, pitch, yaw, matrix)
+    matrix.setflags(write=False)
+    return matrix
+
+
+@functools.lru_cache(maxsize=16)
+def _btw_cached(roll, pitch, yaw):
+    """
+    Cached body to world matrix for the given Euler angles, read-only.
+    """
+    matrix = np.empty((3, 3), dtype=np.float32)
+    # fill the transposed view, i.e. the body to world entries directly
+    _wtb_kernel(roll, pitch, yaw, matrix.T)
+    matrix.setflags(write=False)
+    return matrix
+
 
 def body_to_world_matrix(euler):
     """
     Creates a transformation matrix for directions from a body frame
     to world frame for a body with attitude given by `euler` Euler angles.
     :param euler: The Euler angles of the body frame.
-    :return: The transformation matrix.
+    :return: The transformation matrix (read-only, float32).
     """
-    return np.transpose(world_to_body_matrix(euler))
+    return _btw_cached(euler[0], euler[1], euler[2])
 
 
 def world_to_body_matrix(euler):
@@ -22,25 +85,9 @@ def world_to_body_matrix(euler):
     Creates a transformation matrix for directions from world frame
     to body frame for a body with attitude given by `euler` Euler angles.
     :param euler: The Euler angles of the body frame.
-    :return: The transformation matrix.
+    :return: The transformation matrix (read-only, float32).
     """
-    roll, pitch, yaw = euler[0], euler[1], euler[2]
-
-    Cy = np.cos(yaw)
-    Sy = np.sin(yaw)
-    Cp = np.cos(pitch)
-    Sp = np.sin(pitch)
-    Cr = np.cos(roll)
-    Sr = np.sin(roll)
-
-    matrix = np.array(
-        [
-            [Cy * Cp, Sy * Cp, -Sp],
-            [Cy * Sp * Sr - Cr * Sy, Cr * Cy + Sr * Sy * Sp, Cp * Sr],
-            [Cy * Sp * Cr + Sr * Sy, Cr * Sy * Sp - Cy * Sr, Cr * Cp]
-        ]
-    )
-    return matrix
+    return _wtb_cached(euler[0], euler[1], euler[2])
 
 
 def body_to_world(euler, vector):
@@ -48,10 +95,11 @@ def body_to_world(euler, vector):
     Transforms a direction `vector` from body to world coordinates,
     where the body frame is given by the Euler angles `euler.
     :param euler: Euler angles of the body frame.
-    :param vector: The direction vector to transform.
-    :return: Direction in world frame.
+    :param vector: The direction vector (or an array of N x 3 vectors) to
+        transform.
+    :return: Direction in world frame (float64, independent of the input).
     """
-    return np.dot(body_to_world_matrix(euler), vector)
+    return np.asarray(vector, dtype=np.float64) @ body_to_world_matrix(euler).T
 
 
 class Renderer:
@@ -87,6 +135,48 @@ class Renderer:
         airplane = rendering.make_polygon(v, filled=filled)
         self.viewer.add_onetime(airplane)
 
+    def draw_geom(self, geom):
+        """
+        Draws a geom built with one of the `make_*` functions this frame
+        (one-time, so that the drawing order of the objects is kept)
+        """
+        self.viewer.add_onetime(geom)
+
+    @staticmethod
+    def make_line(color=(0, 0, 0)):  # pragma: no cover
+        """
+        Builds a reusable line, moved with `update_line_3d`
+        """
+        from gym.envs.classic_control import rendering
+        line = rendering.Line((0, 0), (0, 0))
+        line.set_color(*color)
+        return line
+
+    @staticmethod
+    def update_line_3d(line, start, end):
+        line.start = (start[0], start[2])
+        line.end = (end[0], end[2])
+
+    @staticmethod
+    def make_circle(radius, color, filled=True):  # pragma: no cover
+        """
+        Builds a reusable circle, returns it together with its transform
+        """
+        from gym.envs.classic_control import rendering
+        circle = rendering.make_circle(radius, filled=filled)
+        circle.set_color(*color)
+        transform = rendering.Transform()
+        circle.add_attr(transform)
+        return circle, transform
+
+    @staticmethod
+    def make_polygon(v, filled=False):  # pragma: no cover
+        """
+        Builds a reusable polygon, update the vertices via `.v`
+        """
+        from gym.envs.classic_control import rendering
+        return rendering.make_polygon(v, filled=filled)
+
     def add_object(self, new):
         self.objects.append(new)
 
@@ -161,6 +251,20 @@ class QuadCopter(RenderedObject):  # pragma: no cover
         self.source = source
         self._show_thrust = True
         self.arm_length = 0.31
+        # gym shapes, built on the first draw call and then only moved
+        self._lines = None
+        self._propellers = None
+        # scratch buffers for the line end points
+        self._tmp1 = np.empty(3)
+        self._tmp2 = np.empty(3)
+
+    def _make_geoms(self, renderer):
+        # main axis, propeller arms and thrust lines
+        self._lines = [renderer.make_line() for _ in range(9)]
+        self._propellers = [
+            renderer.make_circle(0.2 * self.arm_length, (0, 0, 0))
+            for _ in range(4)
+        ]
 
     def draw(self, renderer):
         status = self.source._state
@@ -170,26 +274,34 @@ class QuadCopter(RenderedObject):  # pragma: no cover
             [status.attitude.roll, status.attitude.pitch, status.attitude.yaw]
         )
 
-        # draw current orientation
-        rotated = body_to_world(trafo, [0, 0, self.arm_length / 2])
-        renderer.draw_line_3d(status.position, status.position + rotated)
+        # body frame vectors: main axis, propeller arms and thrust lines
+        arm = self.arm_length
+        body_vecs = np.zeros((9, 3), dtype=np.float32)
+        body_vecs[0, 2] = arm / 2
+        body_vecs[1:5, :2] = [[arm, 0], [0, arm], [-arm, 0], [0, -arm]]
+        body_vecs[5:, 2] = -0.5 * np.asarray(status.rotor_speeds)**2
+        # rotate all of them to the world frame at once
+        world_vecs = body_vecs @ body_to_world_matrix(trafo).T
 
-        self.draw_propeller(
-            renderer, trafo, status.position, [self.arm_length, 0, 0],
-            status.rotor_speeds[0] / 1
-        )
-        self.draw_propeller(
-            renderer, trafo, status.position, [0, self.arm_length, 0],
-            status.rotor_speeds[1] / 1
-        )
-        self.draw_propeller(
-            renderer, trafo, status.position, [-self.arm_length, 0, 0],
-            status.rotor_speeds[2] / 1
-        )
-        self.draw_propeller(
-            renderer, trafo, status.position, [0, -self.arm_length, 0],
-            status.rotor_speeds[3] / 1
-        )
+        if self._lines is None:
+            self._make_geoms(renderer)
+
+        # draw current orientation
+        position = status.position
+        np.add(position, world_vecs[0], out=self._tmp1)
+        renderer.update_line_3d(self._lines[0], position, self._tmp1)
+        renderer.draw_geom(self._lines[0])
+
+        for i in range(4):
+            propeller = np.add(position, world_vecs[1 + i], out=self._tmp1)
+            renderer.update_line_3d(self._lines[1 + i], position, propeller)
+            renderer.draw_geom(self._lines[1 + i])
+            circle, transform = self._propellers[i]
+            transform.set_translation(propeller[0], propeller[2])
+            renderer.draw_geom(circle)
+            np.add(propeller, world_vecs[5 + i], out=self._tmp2)
+            renderer.update_line_3d(self._lines[5 + i], propeller, self._tmp2)
+            renderer.draw_geom(self._lines[5 + i])
 
     @staticmethod
     def draw_propeller(
@@ -201,18 +313,34 @@ class QuadCopter(RenderedObject):  # pragma: no cover
         arm_length=0.31
     ):
         structure_line = body_to_world(euler, propeller_position)
-        renderer.draw_line_3d(position, position + structure_line)
-        renderer.draw_circle(
-            position + structure_line, 0.2 * arm_length, (0, 0, 0)
-        )
+        propeller = np.add(position, structure_line)
+        renderer.draw_line_3d(position, propeller)
+        renderer.draw_circle(propeller, 0.2 * arm_length, (0, 0, 0))
         thrust_line = body_to_world(euler, [0, 0, -0.5 * rotor_speed**2])
-        renderer.draw_line_3d(
-            position + structure_line, position + structure_line + thrust_line
-        )
+        np.add(thrust_line, propeller, out=thrust_line)
+        renderer.draw_line_3d(propeller, thrust_line)
 
 
 class FixedWingDrone(RenderedObject):
 
+    # plane definition (static geometry, rotated and shifted in draw_airplane)
+    _COORD_PLANE = (
+        np.array(
+            [
+                [1, 0, 1], [1, 0, 3.3], [2, 0, 2], [5.5, 0, 2], [5, 0, 2.5],
+                [4.5, 0, 2], [8, 0, 2], [10, 0, 1], [1, 0, 1]
+            ]
+        ) + np.array([-5, 0, -1.5])
+    ).astype(np.float32) * np.float32(.3)
+    _COORD_WING = (
+        np.array([[4, 0, 1.5], [5, 0, 0], [6, 0, 1.5]]) +
+        np.array([-5, 0, -1.5])
+    ).astype(np.float32) * np.float32(.3)
+    _COORD_PLANE.setflags(write=False)
+    _COORD_WING.setflags(write=False)
+    # the yaw is flipped for rendering
+    _EULER_SIGN = np.array([1, 1, -1])
+
     def __init__(self, source, draw_quad=False):
         self.draw_quad = draw_quad
         self.source = source
@@ -220,16 +348,20 @@ class FixedWingDrone(RenderedObject):
         self.targets = [[100, 0, 0]]
         self.x_normalize = 0.1
         self.z_offset = 5
+        # gym polygons of the airplane, built on the first draw call
+        self._plane = None
+        self._wing = None
 
     def set_target(self, target):
         self.targets = np.array(target)
         self.x_normalize = 14 / np.max(self.targets[:, 0])
 
     def draw(self, renderer):
-        state = self.source._state.copy()
+        # only read from the state, no copy needed
+        state = self.source._state
 
         # transformed main axis
-        trafo = state[6:9] * np.array([1, 1, -1])
+        trafo = state[6:9] * self._EULER_SIGN
 
         # normalize x to have drone between left and right bound
         # and set z to other way round
@@ -274,37 +406,25 @@ class FixedWingDrone(RenderedObject):
         QuadCopter.draw_propeller(renderer, trafo, position, [-1, 0, 0], 0)
         QuadCopter.draw_propeller(renderer, trafo, position, [0, -1, 0], 0)
 
-    @staticmethod
-    def draw_airplane(renderer, position, euler):
-        # plane definition
-        offset = np.array([-5, 0, -1.5])
-        scale = .3
-        coord_plane = (
-            np.array(
-                [
-                    [1, 0, 1], [1, 0, 3.3], [2, 0, 2], [5.5, 0, 2],
-                    [5, 0, 2.5], [4.5, 0, 2], [8, 0, 2], [10, 0, 1], [1, 0, 1]
-                ]
-            ) + offset
-        ) * scale
-
+    def draw_airplane(self, renderer, position, euler):
         rot_matrix = body_to_world_matrix(euler)
         coord_plane_rotated = (
-            np.array([np.dot(rot_matrix, coord)
-                      for coord in coord_plane]) + position
+            self._COORD_PLANE @ rot_matrix.T + position
         )[:, [0, 2]]
-        renderer.draw_polygon(coord_plane_rotated)
 
         # add wing
-        coord_wing = (
-            np.array([[4, 0, 1.5], [5, 0, 0], [6, 0, 1.5]]) + offset
-        ) * scale
         coord_wing_rotated = (
-            np.array([np.dot(rot_matrix, coord)
-                      for coord in coord_wing]) + position
+            self._COORD_WING @ rot_matrix.T + position
         )[:, [0, 2]]
 
-        renderer.draw_polygon(coord_wing_rotated)
+        if self._plane is None:
+            self._plane = renderer.make_polygon(coord_plane_rotated)
+            self._wing = renderer.make_polygon(coord_wing_rotated)
+        else:
+            self._plane.v = coord_plane_rotated
+            self._wing.v = coord_wing_rotated
+        renderer.draw_geom(self._plane)
+        renderer.draw_geom(self._wing)
 
 
 def draw_line_3d(ax, pos1, pos2, color="black"):
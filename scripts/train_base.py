@@ -20,6 +20,10 @@ except ImportError:
             pass
         def add_histogram(self, name, data):
             pass
+try:
+    import orjson
+except ImportError:
+    orjson = None
 from neural_control.dynamics.quad_dynamics_trained import LearntDynamics
 from neural_control.dynamics.fixed_wing_dynamics import LearntFixedWingDynamics
 from neural_control.plotting import (
@@ -27,6 +31,43 @@ from neural_control.plotting import (
 )
 
 
+class _NDArrayEncoder(json.JSONEncoder):
+    """
+    Json encoder that saves numpy arrays as lists
+    """
+
+    def default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        return super().default(o)
+
+
+def load_json(path):
+    """
+    Load a json file (with orjson if it is installed)
+    """
+    if orjson is not None:
+        with open(path, "rb") as infile:
+            return orjson.loads(infile.read())
+    with open(path, "r") as infile:
+        return json.load(infile)
+
+
+def dump_json(obj, path):
+    """
+    Save obj as json file (with orjson if it is installed, which also
+    serializes numpy arrays)
+    """
+    if orjson is not None:
+        with open(path, "wb") as outfile:
+            outfile.write(
+                orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+            )
+        return
+    with open(path, "w") as outfile:
+        json.dump(obj, outfile, cls=_NDArrayEncoder)
+
+
 class TrainBase:
 
     def __init__(
@@ -112,6 +153,7 @@ class TrainBase:
 
         self.state_data = None
         self.net = None
+        self.net_eval = None
 
         self.writer = SummaryWriter()
 
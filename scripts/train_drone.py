@@ -6,7 +6,7 @@ import torch
 import torch.nn.functional as F
 
 from neural_control.dataset import QuadDataset, state_preprocessing
-from train_base import TrainBase
+from train_base import TrainBase, load_json, dump_json
 from neural_control.drone_loss import quad_mpc_loss
 from neural_control.dynamics.quad_dynamics_simple import SimpleDynamics
 from neural_control.dynamics.quad_dynamics_flightmare import (
@@ -62,8 +62,7 @@ class TrainDrone(TrainBase):
             if not os.path.exists(config_path):
                 print("Load old config..")
                 config_path = os.path.join(base_model, "param_dict.json")
-            with open(config_path, "r") as outfile:
-                previous_parameters = json.load(outfile)
+            previous_parameters = load_json(config_path)
             data_std = np.array(previous_parameters["std"]).astype(float)
             data_mean = np.array(previous_parameters["mean"]).astype(float)
         else:
@@ -98,17 +97,14 @@ class TrainDrone(TrainBase):
         self.config["dt"] = self.delta_t
         self.config["take_every_x"] = self.self_play_every_x
         self.config["thresh_stable"] = self.thresh_stable_start
-        for k, v in modified_params.items():
-            if type(v) == np.ndarray:
-                modified_params[k] = v.tolist()
         self.config["modified_params"] = modified_params
 
-        with open(os.path.join(self.save_path, "config.json"), "w") as outfile:
-            json.dump(self.config, outfile)
+        dump_json(self.config, os.path.join(self.save_path, "config.json"))
 
         # init dataset
         self.state_data = QuadDataset(self.epoch_size, **self.config)
         self.init_optimizer()
+        self.net_eval = self.trace_eval_net()
 
     def train_recurrent_model(
         self, in_state, current_state, in_ref_states, ref_states
@@ -118,12 +114,7 @@ class TrainDrone(TrainBase):
         # save the reached states
         # RNN: collect all intermediate states and actions
         batch_size = current_state.size()[0]
-        intermediate_states = torch.zeros(
-            batch_size, self.horizon, self.state_size
-        )
-        action_seq = torch.zeros(
-            batch_size, self.horizon, self.action_dim
-        )
+        states, actions = [], []
         if self.train_mode == "LSTM":
             # reset
             self.net.reset_hidden_state(batch_size)
@@ -149,12 +140,14 @@ class TrainDrone(TrainBase):
             # predict action
             action = self.net(in_state, rel_in_ref_states)
             action = torch.sigmoid(action)
-            action_seq[:, k] = action
+            actions.append(action)
             # action = action_seq[:, k]
             current_state = self.train_dynamics(
                 current_state, action, dt=self.delta_t
             )
-            intermediate_states[:, k] = current_state
+            states.append(current_state)
+        intermediate_states = torch.stack(states, dim=1)
+        action_seq = torch.stack(actions, dim=1)
 
         loss = quad_mpc_loss(
             intermediate_states,
@@ -177,17 +170,16 @@ class TrainDrone(TrainBase):
     ):
         # zero the parameter gradients
         self.optimizer_controller.zero_grad()
-        # save the reached states
-        intermediate_states = torch.zeros(
-            current_state.size()[0], self.horizon, self.state_size
-        )
+        # save the reached states (stacked once after the rollout)
+        states = []
         for k in range(self.horizon):
             # extract action
             action = action_seq[:, k]
             current_state = self.train_dynamics(
                 current_state, action, dt=self.delta_t
             )
-            intermediate_states[:, k] = current_state
+            states.append(current_state)
+        intermediate_states = torch.stack(states, dim=1)
 
         loss = quad_mpc_loss(
             intermediate_states, ref_states, action_seq, printout=0
@@ -202,15 +194,35 @@ class TrainDrone(TrainBase):
         self.optimizer_controller.step()
         return loss
 
+    def trace_eval_net(self):
+        """
+        TorchScript version of the controller for evaluation. The traced
+        module shares its parameters with self.net, training stays eager.
+        LSTM models keep a hidden state and are evaluated in eager mode.
+        """
+        if self.train_mode == "LSTM":
+            return self.net
+        in_state_size = self.state_data.normed_states.size()[1]
+        example_input = (
+            torch.zeros(1, in_state_size),
+            torch.zeros(1, self.horizon, self.ref_dim)
+        )
+        with torch.no_grad():
+            return torch.jit.trace(
+                self.net, example_input, check_trace=False
+            )
+
     def evaluate_model(self, epoch):
         # EVALUATE
-        controller = NetworkWrapper(self.net, self.state_data, **self.config)
+        controller = NetworkWrapper(
+            self.net_eval, self.state_data, **self.config
+        )
 
         evaluator = QuadEvaluator(controller, self.eval_env, **self.config)
         # run with mpc to collect data
         # eval_env.run_mpc_ref("rand", nr_test=5, max_steps=500)
         # run without mpc for evaluation
-        with torch.no_grad():
+        with torch.inference_mode():
             suc_mean, suc_std, div_full_mean, div_full_std, div_mean, div_std = evaluator.run_eval(
                 "rand", nr_test=10, **self.config
             )
@@ -0,0 +1,42 @@
+import numpy as np
+
+from neural_control.environments.rendering import (
+    world_to_body_matrix, body_to_world_matrix, body_to_world
+)
+
+
+def closed_form_world_to_body(roll, pitch, yaw):
+    Cy, Sy = np.cos(yaw), np.sin(yaw)
+    Cp, Sp = np.cos(pitch), np.sin(pitch)
+    Cr, Sr = np.cos(roll), np.sin(roll)
+    return np.array(
+        [
+            [Cy * Cp, Sy * Cp, -Sp],
+            [Cy * Sp * Sr - Cr * Sy, Cr * Cy + Sr * Sy * Sp, Cp * Sr],
+            [Cy * Sp * Cr + Sr * Sy, Cr * Sy * Sp - Cy * Sr, Cr * Cp]
+        ]
+    )
+
+
+def test_rotation_matrices():
+    np.random.seed(0)
+    for euler in np.random.uniform(-np.pi, np.pi, size=(20, 3)):
+        target = closed_form_world_to_body(*euler)
+        assert np.allclose(world_to_body_matrix(euler), target, atol=1e-5)
+        assert np.allclose(body_to_world_matrix(euler), target.T, atol=1e-5)
+
+
+def test_body_to_world():
+    euler = np.array([.3, -.5, 1.2])
+    target = closed_form_world_to_body(*euler).T
+    vector = np.array([1., 2., 3.])
+    assert np.allclose(
+        body_to_world(euler, vector), target @ vector, atol=1e-5
+    )
+    # always float64, also for int input
+    assert body_to_world(euler, [0, 0, 1]).dtype == np.float64
+    # batch of vectors
+    vectors = np.random.rand(5, 3)
+    assert np.allclose(
+        body_to_world(euler, vectors), vectors @ target.T, atol=1e-5
+    )